@@ -8,7 +8,7 @@ import uuid
 import zipfile
 
 from cached_property import cached_property
-from copy import deepcopy
+from functools import lru_cache
 
 from .logger import logger
 from .maps import property_map, field_map, mapper
@@ -16,6 +16,7 @@ from .markdown import plaintext_to_notion, notion_to_plaintext
 from .operations import build_operation
 from .records import Record
 from .settings import S3_URL_PREFIX, BASE_URL
+from .store import Missing
 from .utils import (
     extract_id,
     now,
@@ -27,10 +28,24 @@ from .utils import (
 )
 
 
+@lru_cache(maxsize=None)
+def _get_class_mappers(cls):
+    # a class's mapped fields don't change, so only scan through its attributes once per class
+    mappers = {}
+    for name in dir(cls):
+        field = getattr(cls, name)
+        if isinstance(field, mapper):
+            mappers[name] = field
+    return mappers
+
+
 class Children(object):
 
     child_list_key = "content"
 
+    # the table that the records in the child list are stored in
+    child_table = "block"
+
     def __init__(self, parent):
         self._parent = parent
         self._client = parent._client
@@ -51,6 +66,13 @@ class Children(object):
     def _content_list(self):
         return self._parent.get(self.child_list_key) or []
 
+    def _prefetch(self, ids):
+        # load any children that aren't in the local store yet with a single request, rather than one request each
+        store = self._client._store
+        missing = [id for id in ids if store._get(self.child_table, id) is Missing]
+        if missing and not self._client.in_transaction():
+            self._client.refresh_records(**{self.child_table: missing})
+
     def _get_block(self, id):
 
         block = self._client.get_block(id)
@@ -85,6 +107,7 @@ class Children(object):
     def __getitem__(self, key):
         result = self._content_list()[key]
         if isinstance(result, list):
+            self._prefetch(result)
             return [self._get_block(id) for id in result]
         else:
             return self._get_block(result)
@@ -93,7 +116,9 @@ class Children(object):
         self._get_block(self._content_list()[key]).remove()
 
     def __iter__(self):
-        return iter(self._get_block(id) for id in self._content_list())
+        content = self._content_list()
+        self._prefetch(content)
+        return iter(self._get_block(id) for id in content)
 
     def __reversed__(self):
         return reversed(iter(self))
@@ -239,12 +264,7 @@ class Block(Record):
         return not (self._alias_parent is None)
 
     def _get_mappers(self):
-        mappers = {}
-        for name in dir(self.__class__):
-            field = getattr(self.__class__, name)
-            if isinstance(field, mapper):
-                mappers[name] = field
-        return mappers
+        return _get_class_mappers(self.__class__)
 
     def _convert_diff_to_changelist(self, difference, old_val, new_val):
 
@@ -254,12 +274,12 @@ class Block(Record):
         remaining = []
         content_changed = False
 
-        for d in deepcopy(difference):
+        for d in difference:
             operation, path, values = d
 
-            # normalize path
+            # normalize path (into a new list, leaving the diff itself untouched)
             path = path if path else []
-            path = path.split(".") if isinstance(path, str) else path
+            path = path.split(".") if isinstance(path, str) else list(path)
             if operation in ["add", "remove"]:
                 path.append(values[0][0])
             while isinstance(path[-1], int):
@@ -285,8 +305,8 @@ class Block(Record):
 
         if content_changed:
 
-            old = deepcopy(old_val.get("content", []))
-            new = deepcopy(new_val.get("content", []))
+            old = list(old_val.get("content", []))
+            new = list(new_val.get("content", []))
 
             # track what's been added and removed
             removed = set(old) - set(new)
@@ -333,11 +353,13 @@ class Block(Record):
                 )
 
                 # Remove the block's ID from a list on its parent, if needed
-                if self.parent.child_list_key:
+                # (looking the parent up just once, as each lookup goes back through the client)
+                child_list_key = self.parent.child_list_key
+                if child_list_key:
                     self._client.submit_transaction(
                         build_operation(
                             id=self.get("parent_id"),
-                            path=[self.parent.child_list_key],
+                            path=[child_list_key],
                             args={"id": self.id},
                             command="listRemove",
                             table=self.get("parent_table"),
@@ -803,6 +825,7 @@ class CollectionViewBlock(MediaBlock):
 class CollectionViewBlockViews(Children):
 
     child_list_key = "view_ids"
+    child_table = "collection_view"
 
     def _get_block(self, view_id):
 
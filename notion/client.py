@@ -241,8 +241,14 @@ class NotionClient(object):
         """
         self._store.call_get_record_values(**kwargs)
 
+    def get_collection_row_ids(self, collection_id):
+        """
+        Query the server for the IDs of the rows currently in the collection identified by the ID passed in.
+        """
+        return [row.id for row in self.get_collection(collection_id).get_rows()]
+
     def refresh_collection_rows(self, collection_id):
-        row_ids = [row.id for row in self.get_collection(collection_id).get_rows()]
+        row_ids = self.get_collection_row_ids(collection_id)
         self._store.set_collection_rows(collection_id, row_ids)
 
     def post(self, endpoint, data):
@@ -17,6 +17,11 @@ from .utils import (
     slugify,
 )
 
+_TEXT_TYPES = frozenset({"title", "text"})
+_URL_TYPES = frozenset({"email", "phone_number", "url"})
+_TIME_TYPES = frozenset({"created_time", "last_edited_time"})
+_USER_TYPES = frozenset({"created_by", "last_edited_by"})
+
 
 class NotionDate(object):
 
@@ -289,6 +294,15 @@ class CollectionView(Record):
         return self.build_query(**self.get("query", {}))
 
 
+COLLECTION_VIEW_TYPES = {}
+
+
+def _register_view_type(cls):
+    COLLECTION_VIEW_TYPES[cls._type] = cls
+    return cls
+
+
+@_register_view_type
 class BoardView(CollectionView):
 
     _type = "board"
@@ -296,16 +310,19 @@ class BoardView(CollectionView):
     group_by = field_map("query.group_by")
 
 
+@_register_view_type
 class TableView(CollectionView):
 
     _type = "table"
 
 
+@_register_view_type
 class ListView(CollectionView):
 
     _type = "list"
 
 
+@_register_view_type
 class CalendarView(CollectionView):
 
     _type = "calendar"
@@ -317,6 +334,7 @@ class CalendarView(CollectionView):
         return super().build_query(calendar_by=calendar_by, **kwargs)
 
 
+@_register_view_type
 class GalleryView(CollectionView):
 
     _type = "gallery"
@@ -494,15 +512,24 @@ class CollectionRowBlock(PageBlock):
             else:
                 remaining.append(d)
 
-        for prop_id in changed_props:
-            prop = self.collection.get_schema_property(prop_id)
-            old = self._convert_notion_to_python(
-                old_val.get("properties", {}).get(prop_id), prop
-            )
-            new = self._convert_notion_to_python(
-                new_val.get("properties", {}).get(prop_id), prop
-            )
-            changes.append(("prop_changed", prop["slug"], (old, new)))
+        if changed_props:
+
+            # index the schema by property id once, rather than searching it for every changed property
+            schema_by_id = {
+                prop["id"]: prop for prop in self.collection.get_schema_properties()
+            }
+
+            for prop_id in changed_props:
+                prop = schema_by_id.get(prop_id)
+                if prop is None:
+                    continue
+                old = self._convert_notion_to_python(
+                    old_val.get("properties", {}).get(prop_id), prop
+                )
+                new = self._convert_notion_to_python(
+                    new_val.get("properties", {}).get(prop_id), prop
+                )
+                changes.append(("prop_changed", prop["slug"], (old, new)))
 
         return changes + super()._convert_diff_to_changelist(
             remaining, old_val, new_val
@@ -510,30 +537,32 @@ class CollectionRowBlock(PageBlock):
 
     def _convert_notion_to_python(self, val, prop):
 
-        if prop["type"] in ["title", "text"]:
+        ptype = prop["type"]
+
+        if ptype in _TEXT_TYPES:
             val = notion_to_markdown(val) if val else ""
-        if prop["type"] in ["number"]:
+        elif ptype == "number":
             if val is not None:
                 val = val[0][0]
                 if "." in val:
                     val = float(val)
                 else:
                     val = int(val)
-        if prop["type"] in ["select"]:
+        elif ptype == "select":
             val = val[0][0] if val else None
-        if prop["type"] in ["multi_select"]:
+        elif ptype == "multi_select":
             val = [v.strip() for v in val[0][0].split(",")] if val else []
-        if prop["type"] in ["person"]:
+        elif ptype == "person":
             val = (
                 [self._client.get_user(item[1][0][1]) for item in val if item[0] == "‣"]
                 if val
                 else []
             )
-        if prop["type"] in ["email", "phone_number", "url"]:
+        elif ptype in _URL_TYPES:
             val = val[0][0] if val else ""
-        if prop["type"] in ["date"]:
+        elif ptype == "date":
             val = NotionDate.from_notion(val)
-        if prop["type"] in ["file"]:
+        elif ptype == "file":
             val = (
                 [
                     add_signed_prefix_as_needed(
@@ -545,9 +574,9 @@ class CollectionRowBlock(PageBlock):
                 if val
                 else []
             )
-        if prop["type"] in ["checkbox"]:
+        elif ptype == "checkbox":
             val = val[0][0] == "Yes" if val else False
-        if prop["type"] in ["relation"]:
+        elif ptype == "relation":
             val = (
                 [
                     self._client.get_block(item[1][0][1])
@@ -557,11 +586,11 @@ class CollectionRowBlock(PageBlock):
                 if val
                 else []
             )
-        if prop["type"] in ["created_time", "last_edited_time"]:
-            val = self.get(prop["type"])
+        elif ptype in _TIME_TYPES:
+            val = self.get(ptype)
             val = datetime.utcfromtimestamp(val / 1000)
-        if prop["type"] in ["created_by", "last_edited_by"]:
-            val = self.get(prop["type"] + "_id")
+        elif ptype in _USER_TYPES:
+            val = self.get(ptype + "_id")
             val = self._client.get_user(val)
 
         return val
@@ -580,7 +609,7 @@ class CollectionRowBlock(PageBlock):
             raise AttributeError(
                 "Object does not have property '{}'".format(identifier)
             )
-        if prop["type"] in ["select"] or prop["type"] in ["multi_select"]:
+        if prop["type"] in ("select", "multi_select"):
             schema_update, prop = self.collection.check_schema_select_options(prop, val)
             if schema_update:
                 self.collection.set(
@@ -593,7 +622,9 @@ class CollectionRowBlock(PageBlock):
 
     def _convert_python_to_notion(self, val, prop, identifier="<unknown>"):
 
-        if prop["type"] in ["title", "text"]:
+        ptype = prop["type"]
+
+        if ptype in _TEXT_TYPES:
             if not val:
                 val = ""
             if not isinstance(val, str):
@@ -601,7 +632,7 @@ class CollectionRowBlock(PageBlock):
                     "Value passed to property '{}' must be a string.".format(identifier)
                 )
             val = markdown_to_notion(val)
-        if prop["type"] in ["number"]:
+        elif ptype == "number":
             if val is not None:
                 if not isinstance(val, float) and not isinstance(val, int):
                     raise TypeError(
@@ -610,7 +641,7 @@ class CollectionRowBlock(PageBlock):
                         )
                     )
                 val = [[str(val)]]
-        if prop["type"] in ["select"]:
+        elif ptype == "select":
             if not val:
                 val = None
             else:
@@ -623,7 +654,7 @@ class CollectionRowBlock(PageBlock):
                         )
                     )
                 val = [[val]]
-        if prop["type"] in ["multi_select"]:
+        elif ptype == "multi_select":
             if not val:
                 val = []
             valid_options = [p["value"].lower() for p in prop["options"]]
@@ -637,53 +668,59 @@ class CollectionRowBlock(PageBlock):
                         )
                     )
             val = [[",".join(val)]]
-        if prop["type"] in ["person"]:
+        elif ptype == "person":
             userlist = []
             if not isinstance(val, list):
                 val = [val]
             for user in val:
+                if userlist:
+                    userlist.append([","])
                 user_id = user if isinstance(user, str) else user.id
-                userlist += [["‣", [["u", user_id]]], [","]]
-            val = userlist[:-1]
-        if prop["type"] in ["email", "phone_number", "url"]:
+                userlist.append(["‣", [["u", user_id]]])
+            val = userlist
+        elif ptype in _URL_TYPES:
             val = [[val, [["a", val]]]]
-        if prop["type"] in ["date"]:
+        elif ptype == "date":
             if isinstance(val, date) or isinstance(val, datetime):
                 val = NotionDate(val)
             if isinstance(val, NotionDate):
                 val = val.to_notion()
             else:
                 val = []
-        if prop["type"] in ["file"]:
+        elif ptype == "file":
             filelist = []
             if not isinstance(val, list):
                 val = [val]
             for url in val:
+                if filelist:
+                    filelist.append([","])
                 url = remove_signed_prefix_as_needed(url)
                 filename = url.split("/")[-1]
-                filelist += [[filename, [["a", url]]], [","]]
-            val = filelist[:-1]
-        if prop["type"] in ["checkbox"]:
+                filelist.append([filename, [["a", url]]])
+            val = filelist
+        elif ptype == "checkbox":
             if not isinstance(val, bool):
                 raise TypeError(
                     "Value passed to property '{}' must be a bool.".format(identifier)
                 )
             val = [["Yes" if val else "No"]]
-        if prop["type"] in ["relation"]:
+        elif ptype == "relation":
             pagelist = []
             if not isinstance(val, list):
                 val = [val]
             for page in val:
+                if pagelist:
+                    pagelist.append([","])
                 if isinstance(page, str):
                     page = self._client.get_block(page)
-                pagelist += [["‣", [["p", page.id]]], [","]]
-            val = pagelist[:-1]
-        if prop["type"] in ["created_time", "last_edited_time"]:
+                pagelist.append(["‣", [["p", page.id]]])
+            val = pagelist
+        elif ptype in _TIME_TYPES:
             val = int(val.timestamp() * 1000)
-            return prop["type"], val
-        if prop["type"] in ["created_by", "last_edited_by"]:
+            return ptype, val
+        elif ptype in _USER_TYPES:
             val = val if isinstance(val, str) else val.id
-            return prop["type"], val
+            return ptype, val
 
         return ["properties", prop["id"]], val
 
@@ -728,6 +765,8 @@ class QueryResult(object):
         self.collection = collection
         self._client = collection._client
         self._block_ids = self._get_block_ids(result)
+        self._block_id_set = set(self._block_ids)
+        self._blocks = None
         self.total = result.get("total", -1)
         self.aggregates = result.get("aggregationResults", [])
         self.aggregate_ids = [
@@ -761,14 +800,20 @@ class QueryResult(object):
     def __len__(self):
         return len(self._block_ids)
 
+    def _get_blocks(self):
+        # build the row blocks lazily, once, so that re-iterating the results doesn't reconstruct them
+        if self._blocks is None:
+            self._blocks = [self._get_block(id) for id in self._block_ids]
+        return self._blocks
+
     def __getitem__(self, key):
-        return list(iter(self))[key]
+        return self._get_blocks()[key]
 
     def __iter__(self):
-        return iter(self._get_block(id) for id in self._block_ids)
+        return iter(self._get_blocks())
 
     def __reversed__(self):
-        return reversed(iter(self))
+        return reversed(self._get_blocks())
 
     def __contains__(self, item):
         if isinstance(item, str):
@@ -777,18 +822,30 @@ class QueryResult(object):
             item_id = item.id
         else:
             return False
-        return item_id in self._block_ids
+        return item_id in self._block_id_set
+
+
+QUERY_RESULT_TYPES = {}
+
 
+def _register_query_result_type(cls):
+    QUERY_RESULT_TYPES[cls._type] = cls
+    return cls
+
+
+@_register_query_result_type
 class TableQueryResult(QueryResult):
 
     _type = "table"
 
 
+@_register_query_result_type
 class BoardQueryResult(QueryResult):
 
     _type = "board"
 
 
+@_register_query_result_type
 class CalendarQueryResult(QueryResult):
 
     _type = "calendar"
@@ -800,24 +857,13 @@ class CalendarQueryResult(QueryResult):
         return block_ids
 
 
+@_register_query_result_type
 class ListQueryResult(QueryResult):
 
     _type = "list"
 
 
+@_register_query_result_type
 class GalleryQueryResult(QueryResult):
 
     _type = "gallery"
-
-
-COLLECTION_VIEW_TYPES = {
-    cls._type: cls
-    for cls in locals().values()
-    if type(cls) == type and issubclass(cls, CollectionView) and hasattr(cls, "_type")
-}
-
-QUERY_RESULT_TYPES = {
-    cls._type: cls
-    for cls in locals().values()
-    if type(cls) == type and issubclass(cls, QueryResult) and hasattr(cls, "_type")
-}
@@ -22,7 +22,8 @@ if NOTIONPY_LOG_LEVEL == "disabled":
     handler = logging.NullHandler()
     logger.addHandler(handler)
 else:
-    handler = logging.FileHandler(LOG_FILE)
+    # delay opening the log file until the first record is actually emitted
+    handler = logging.FileHandler(LOG_FILE, delay=True)
     formatter = logging.Formatter("\n%(asctime)s - %(levelname)s - %(message)s")
     handler.setFormatter(formatter)
     logger.addHandler(handler)
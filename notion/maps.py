@@ -33,21 +33,22 @@ def field_map(path, python_to_api=lambda x: x, api_to_python=lambda x: x):
     if isinstance(path, str):
         path = path.split(".")
 
+    # inspect the converters' signatures once up front, rather than on every get/set
+    api_params = signature(api_to_python).parameters
+    api_to_python_takes_client = "client" in api_params and "id" in api_params
+    python_to_api_takes_client = "client" in signature(python_to_api).parameters
+
     def fget(self):
-        kwargs = {}
-        if (
-            "client" in signature(api_to_python).parameters
-            and "id" in signature(api_to_python).parameters
-        ):
-            kwargs["client"] = self._client
-            kwargs["id"] = self.id
-        return api_to_python(self.get(path), **kwargs)
+        if api_to_python_takes_client:
+            return api_to_python(self.get(path), client=self._client, id=self.id)
+        return api_to_python(self.get(path))
 
     def fset(self, value):
-        kwargs = {}
-        if "client" in signature(python_to_api).parameters:
-            kwargs["client"] = self._client
-        self.set(path, python_to_api(value, **kwargs))
+        if python_to_api_takes_client:
+            value = python_to_api(value, client=self._client)
+        else:
+            value = python_to_api(value)
+        self.set(path, value)
 
     return mapper(
         fget=fget,
@@ -69,9 +70,14 @@ def property_map(
     this representation into commonmark-compatible markdown, and back again when saving.
     """
 
+    python_to_api_takes_client = "client" in signature(python_to_api).parameters
+    api_params = signature(api_to_python).parameters
+    api_to_python_takes_client = "client" in api_params
+    api_to_python_takes_id = "id" in api_params
+
     def py2api(x, client=None):
         kwargs = {}
-        if "client" in signature(python_to_api).parameters:
+        if python_to_api_takes_client:
             kwargs["client"] = client
         x = python_to_api(x, **kwargs)
         if markdown:
@@ -83,10 +89,9 @@ def property_map(
         if markdown:
             x = notion_to_markdown(x)
         kwargs = {}
-        params = signature(api_to_python).parameters
-        if "client" in params:
+        if api_to_python_takes_client:
             kwargs["client"] = client
-        if "id" in params:
+        if api_to_python_takes_id:
             kwargs["id"] = id
         return api_to_python(x, **kwargs)
 
@@ -1,7 +1,7 @@
 import commonmark
 import re
 import html
-from xml.dom import minidom
+from functools import lru_cache
 
 from commonmark.dump import prepare
 
@@ -75,6 +75,28 @@ _NOTION_TO_MARKDOWN_MAPPER = {"i": "☃", "b": "☃☃", "s": "~~", "c": "`", "e
 
 FORMAT_PRECEDENCE = ["s", "b", "i", "a", "c", "e"]
 
+_FORMAT_PRECEDENCE_INDEX = {f: i for i, f in enumerate(FORMAT_PRECEDENCE)}
+
+# stand-in for dashes while parsing markdown, and its percent-encoded form (as it appears in link URLs)
+_DASH_PLACEHOLDER = "⸻"
+_DASH_PLACEHOLDER_ENCODED = "%E2%B8%BB"
+
+_LATEX_RE = re.compile(
+    r"(?<!\\\\|\$\$)(?:\\\\)*((\$\$)+)(?!(\$\$))(.+?)(?<!(\$\$))\1(?!(\$\$))"
+)
+_WHITESPACE_SPLIT_RE = re.compile(
+    r"^(?P<leading>\s*)(?P<stripped>(\s|.)*?)(?P<trailing>\s*)$"
+)
+# the equation attribute is written (html-escaped) by `handle_latex` in `_markdown_to_notion`
+_LATEX_EQUATION_RE = re.compile(r'equation="([^"]*)"')
+_STRIKETHROUGH_RE = re.compile(r"~~(.*?)~~", re.S)
+# words separated by single spaces (optionally after a comma), which commonmark passes through unchanged
+_PLAIN_TEXT_RE = re.compile(r"[^\W_]+(?:,? [^\W_]+)*")
+
+
+def _format_precedence_key(f):
+    return _FORMAT_PRECEDENCE_INDEX.get(f[0], -1)
+
 
 def _extract_text_and_format_from_ast(item):
 
@@ -82,10 +104,8 @@ def _extract_text_and_format_from_ast(item):
         if item.get("literal", "") == "<s>":
             return "", ("s",)
         if item.get("literal", "").startswith("<latex"):
-            elem = minidom.parseString(
-                item.get("literal", "") + "</latex>"
-            ).documentElement
-            equation = elem.attributes["equation"].value
+            match = _LATEX_EQUATION_RE.search(item["literal"])
+            equation = html.unescape(match.group(1)) if match else ""
             return "", ("e", equation)
 
     if item["type"] == "emph":
@@ -116,15 +136,41 @@ def _get_format(notion_segment, as_set=False):
             return notion_segment[1]
 
 
+def _freeze(value):
+    # convert nested lists into (hashable) nested tuples, so they can be used as cache keys/values
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value):
+    # convert nested tuples back into fresh nested lists, so callers can safely mutate them
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
 def markdown_to_notion(markdown):
 
     if not isinstance(markdown, str):
         markdown = str(markdown)
 
+    # short-circuit plain text that has no markdown formatting to parse
+    if _PLAIN_TEXT_RE.fullmatch(markdown):
+        return [[markdown]]
+
+    return _thaw(_cached_markdown_to_notion(markdown))
+
+
+@lru_cache(maxsize=4096)
+def _cached_markdown_to_notion(markdown):
+    return _freeze(_markdown_to_notion(markdown))
+
+
+def _markdown_to_notion(markdown):
+
     # commonmark doesn't support strikethrough, so we need to handle it ourselves
-    while markdown.count("~~") >= 2:
-        markdown = markdown.replace("~~", "<s>", 1)
-        markdown = markdown.replace("~~", "</s>", 1)
+    markdown = _STRIKETHROUGH_RE.sub(r"<s>\1</s>", markdown)
 
     # commonmark doesn't support latex blocks, so we need to handle it ourselves
     def handle_latex(match):
@@ -132,14 +178,10 @@ def markdown_to_notion(markdown):
             html.escape(match.group(0)[2:-2])
         )
 
-    markdown = re.sub(
-        r"(?<!\\\\|\$\$)(?:\\\\)*((\$\$)+)(?!(\$\$))(.+?)(?<!(\$\$))\1(?!(\$\$))",
-        handle_latex,
-        markdown,
-    )
+    markdown = _LATEX_RE.sub(handle_latex, markdown)
 
     # we don't want to touch dashes, so temporarily replace them here
-    markdown = markdown.replace("-", "⸻")
+    markdown = markdown.replace("-", _DASH_PLACEHOLDER)
 
     parser = commonmark.Parser()
     ast = prepare(parser.parse(markdown))
@@ -148,6 +190,9 @@ def markdown_to_notion(markdown):
 
     notion = []
 
+    # sorted list forms of the format sets seen so far, so runs with the same styling share one
+    format_lists = {}
+
     for section in ast:
 
         _, ended_format = _extract_text_and_format_from_ast(section)
@@ -178,11 +223,15 @@ def markdown_to_notion(markdown):
                 literal = "\n"
 
             if literal:
-                notion.append(
-                    [literal, [list(f) for f in sorted(format)]]
-                    if format
-                    else [literal]
-                )
+                if format:
+                    key = frozenset(format)
+                    format_list = format_lists.get(key)
+                    if format_list is None:
+                        format_list = [list(f) for f in sorted(format)]
+                        format_lists[key] = format_list
+                    notion.append([literal, format_list])
+                else:
+                    notion.append([literal])
 
             # in the ast format, code blocks are meant to be immediately self-closing
             if ("c",) in format:
@@ -193,31 +242,66 @@ def markdown_to_notion(markdown):
         notion[-1][0] = notion[-1][0].rstrip("\n")
 
     # consolidate any adjacent text blocks with identical styles
+    # (keeping track of the last block's format, so each item's format is only computed once)
     consolidated = []
+    last_format = None
     for item in notion:
-        if consolidated and _get_format(consolidated[-1], as_set=True) == _get_format(
-            item, as_set=True
-        ):
+        item_format = _get_format(item, as_set=True)
+        if consolidated and item_format == last_format:
             consolidated[-1][0] += item[0]
         elif item[0]:
             consolidated.append(item)
+            last_format = item_format
 
     return cleanup_dashes(consolidated)
 
 
-def cleanup_dashes(thing):
-    regex_pattern = re.compile("⸻|%E2%B8%BB")
-    if type(thing) is list:
-        for counter, value in enumerate(thing):
-            thing[counter] = cleanup_dashes(value)
-    elif type(thing) is str:
-        return regex_pattern.sub("-", thing)
+def _restore_dashes(text):
+    text = text.replace(_DASH_PLACEHOLDER, "-")
+    if _DASH_PLACEHOLDER_ENCODED in text:
+        text = text.replace(_DASH_PLACEHOLDER_ENCODED, "-")
+    return text
+
+
+def cleanup_dashes(notion):
+    # the dash placeholders can only appear in the text of each segment, or in the string
+    # arguments of its formats (e.g. link URLs, which commonmark percent-encodes, or equations)
+    for item in notion:
+        item[0] = _restore_dashes(item[0])
+        if len(item) == 2:
+            for f in item[1]:
+                for i in range(1, len(f)):
+                    if isinstance(f[i], str):
+                        f[i] = _restore_dashes(f[i])
 
-    return thing
+    return notion
 
 
 def notion_to_markdown(notion):
 
+    # short-circuit a single unformatted segment, which doesn't need any markdown added
+    if notion and len(notion) == 1 and len(notion[0]) == 1:
+        text = notion[0][0]
+        if isinstance(text, str) and "☃" not in text and "***" not in text:
+            return text
+
+    frozen = _freeze(notion)
+    try:
+        hash(frozen)
+    except TypeError:
+        # the value contains something unhashable (e.g. a dict of date data), so skip the cache
+        return _notion_to_markdown(notion)
+
+    return _cached_notion_to_markdown(frozen)
+
+
+@lru_cache(maxsize=4096)
+def _cached_notion_to_markdown(notion):
+    return _notion_to_markdown(notion)
+
+
+def _notion_to_markdown(notion):
+
     markdown_chunks = []
 
     use_underscores = True
@@ -226,12 +310,13 @@ def notion_to_markdown(notion):
 
         markdown = ""
 
-        text = item[0]
-        format = item[1] if len(item) == 2 else []
+        if len(item) == 2:
+            text, format = item
+        else:
+            text = item[0]
+            format = ()
 
-        match = re.match(
-            "^(?P<leading>\s*)(?P<stripped>(\s|.)*?)(?P<trailing>\s*)$", text
-        )
+        match = _WHITESPACE_SPLIT_RE.match(text)
         if not match:
             raise Exception("Unable to extract text from: %r" % text)
 
@@ -241,12 +326,7 @@ def notion_to_markdown(notion):
 
         markdown += leading_whitespace
 
-        sorted_format = sorted(
-            format,
-            key=lambda x: FORMAT_PRECEDENCE.index(x[0])
-            if x[0] in FORMAT_PRECEDENCE
-            else -1,
-        )
+        sorted_format = sorted(format, key=_format_precedence_key)
 
         for f in sorted_format:
             if f[0] in _NOTION_TO_MARKDOWN_MAPPER:
@@ -275,7 +355,7 @@ def notion_to_markdown(notion):
         markdown += trailing_whitespace
 
         # to make it parseable, add a space after if it combines code/links and emphasis formatting
-        format_types = [f[0] for f in format]
+        format_types = {f[0] for f in format}
         if (
             ("c" in format_types or "a" in format_types)
             and ("b" in format_types or "i" in format_types)
@@ -286,12 +366,12 @@ def notion_to_markdown(notion):
         markdown_chunks.append(markdown)
 
     # use underscores as needed to separate adjacent chunks to avoid ambiguous runs of asterisks
-    full_markdown = ""
+    final_chunks = []
     last_used_underscores = False
-    for i in range(len(markdown_chunks)):
+    last_index = len(markdown_chunks) - 1
+    for i, curr in enumerate(markdown_chunks):
         prev = markdown_chunks[i - 1] if i > 0 else ""
-        curr = markdown_chunks[i]
-        next = markdown_chunks[i + 1] if i < len(markdown_chunks) - 1 else ""
+        next = markdown_chunks[i + 1] if i < last_index else ""
         prev_ended_in_delimiter = not prev or prev[-1] in delimiters
         next_starts_with_delimiter = not next or next[0] in delimiters
         if (
@@ -317,39 +397,42 @@ def notion_to_markdown(notion):
             final_markdown = final_markdown.replace("***", "**_", 1)
             final_markdown = final_markdown.replace("***", "_**", 1)
 
-        full_markdown += final_markdown
+        final_chunks.append(final_markdown)
 
-    return full_markdown
+    return "".join(final_chunks)
 
 
 def notion_to_plaintext(notion, client=None):
 
-    plaintext = ""
+    plaintext = []
 
     for item in notion or []:
 
-        text = item[0]
-        formats = item[1] if len(item) == 2 else []
+        if len(item) == 2:
+            text, formats = item
+        else:
+            text = item[0]
+            formats = ()
 
         if text == "‣":
 
             for f in formats:
                 if f[0] == "p":  # page link
                     if client is None:
-                        plaintext += "page:" + f[1]
+                        plaintext.append("page:" + f[1])
                     else:
-                        plaintext += client.get_block(f[1]).title_plaintext
+                        plaintext.append(client.get_block(f[1]).title_plaintext)
                 elif f[0] == "u":  # user link
                     if client is None:
-                        plaintext += "user:" + f[1]
+                        plaintext.append("user:" + f[1])
                     else:
-                        plaintext += client.get_user(f[1]).full_name
+                        plaintext.append(client.get_user(f[1]).full_name)
 
             continue
 
-        plaintext += text
+        plaintext.append(text)
 
-    return plaintext
+    return "".join(plaintext)
 
 
 def plaintext_to_notion(plaintext):
@@ -1,4 +1,6 @@
 import json
+import os
+import queue
 import re
 import requests
 import threading
@@ -8,66 +10,209 @@ import uuid
 from collections import defaultdict
 from inspect import signature
 from requests import HTTPError
+from requests.adapters import HTTPAdapter
+
+try:
+    # orjson is an optional (faster) JSON library
+    import orjson
+except ImportError:
+    orjson = None
+
 
 from .collection import Collection
 from .logger import logger
 from .records import Record
 
 
+# fallback for responses that can't be split up by their length prefixes: matches either a ping
+# frame, or a frame containing a JSON blob (captured in the group)
+_FRAME_RE = re.compile(rb'\d+:\d+(?:"primus::ping::\d+"|(\{.*?\})(?=\d|$))')
+_VERSION_KEY_RE = re.compile(r"versions/([^:]+):(.+)")
+_COLLECTION_KEY_RE = re.compile(r"collection/(.+)")
+
+# the fields common to every subscription message (the version is -1 when we have no local version)
+_SUBSCRIPTION_TEMPLATE = {
+    "type": "/api/v1/registerSubscription",
+    "requestId": None,
+    "key": None,
+    "version": -1,
+}
+
+# how long (in seconds) to wait for more records to batch together before sending subscriptions
+SUBSCRIPTION_BATCH_DELAY = 0.05
+
+# how long (in seconds) to wait before retrying subscriptions whose request failed
+SUBSCRIPTION_RETRY_DELAY = 5
+
+# (connect, read) timeouts for monitoring requests; the server holds long-polls open until it has something to send
+POLL_TIMEOUT = (5, 60)
+
+
+def _generate_request_ids(count):
+    """
+    Generate `count` random (version 4) UUID strings, from a single draw of random bytes.
+    """
+    entropy = os.urandom(16 * count)
+    for start in range(0, 16 * count, 16):
+        yield str(uuid.UUID(bytes=entropy[start : start + 16], version=4))
+
+
+def _json_loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _json_dumps_ascii(obj):
+    """
+    Serialize `obj` to compact, ASCII-only JSON bytes (so that its length in bytes matches its length in
+    characters, as the frame length prefixes require).
+    """
+    if orjson is not None:
+        # orjson doesn't escape non-ASCII characters, so only use its output if there weren't any
+        data = orjson.dumps(obj)
+        try:
+            data.decode("ascii")
+            return data
+        except UnicodeDecodeError:
+            pass
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def _split_frames(data):
+    """
+    Split a long-polling response, which is a sequence of "<length>:<packet>" frames, into its packets
+    (each being a numeric packet type followed by the packet's data). Raises ValueError if the response
+    isn't framed as expected.
+    """
+    text = data.decode()
+    packets = []
+    pos = 0
+    while pos < len(text):
+        colon = text.index(":", pos)
+        start = colon + 1
+        end = start + int(text[pos:colon])
+        if end > len(text):
+            raise ValueError("Frame length runs past the end of the response")
+        packets.append(text[start:end])
+        pos = end
+    return packets
+
+
 class Monitor(object):
 
     thread = None
 
     def __init__(self, client, root_url="https://msgstore.www.notion.so/primus/"):
         self.client = client
+        self.session = self._create_session()
         self.session_id = str(uuid.uuid4())
         self.root_url = root_url
-        self._subscriptions = set()
+        # subscribed records, keyed by (table, id) so membership tests don't need to hash the records themselves
+        self._subscriptions = {}
+        self._subscriptions_lock = threading.Lock()
+        # records waiting to be subscribed in the next batch, and the timer that will send it
+        self._pending_subscriptions = []
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
+        # once polling starts, data to post is handed off to a sender thread (so replying to pings doesn't
+        # hold up decoding a poll); until then, it's posted directly
+        self._post_queue = None
         self.initialize()
 
+    def _create_session(self):
+        """
+        Long-polling gets a session of its own, so it doesn't tie up connections in the client's pool. It shares
+        the client's cookies, headers and proxies (so it stays authenticated as the same user, and goes out the
+        same way), and copies its TLS and environment settings.
+        """
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        session.cookies = self.client.session.cookies
+        session.headers = self.client.session.headers
+        session.proxies = self.client.session.proxies
+        session.verify = self.client.session.verify
+        session.cert = self.client.session.cert
+        session.trust_env = self.client.session.trust_env
+        return session
+
     def _decode_numbered_json_thing(self, thing):
 
-        thing = thing.decode().strip()
+        thing = thing.strip()
 
-        for ping in re.findall('\d+:\d+"primus::ping::\d+"', thing):
-            logger.debug("Received ping: {}".format(ping))
-            self.post_data(ping.replace("::ping::", "::pong::"))
+        try:
+            packets = _split_frames(thing)
+        except ValueError:
+            logger.debug(
+                "Could not split monitoring response into frames; matching patterns instead"
+            )
+            packets = None
 
         results = []
-        for blob in re.findall("\d+:\d+(\{.*?\})(?=\d|$)", thing):
-            results.append(json.loads(blob))
-        if thing and not results and "::ping::" not in thing:
-            logger.debug("Could not parse monitoring response: {}".format(thing))
+        if packets is not None:
+            for packet in packets:
+                packet_data = packet.lstrip("0123456789")
+                if packet_data.startswith('"primus::ping::'):
+                    logger.debug("Received ping: %s", packet)
+                    pong = packet.replace("::ping::", "::pong::")
+                    self.post_data("{}:{}".format(len(pong), pong).encode())
+                elif packet_data.startswith("{"):
+                    results.append(_json_loads(packet_data))
+        else:
+            for match in _FRAME_RE.finditer(thing):
+                blob = match.group(1)
+                if blob is None:
+                    ping = match.group(0)
+                    logger.debug("Received ping: %s", ping.decode())
+                    self.post_data(ping.replace(b"::ping::", b"::pong::"))
+                else:
+                    results.append(_json_loads(blob.decode()))
+        if thing and not results and b"::ping::" not in thing:
+            logger.debug("Could not parse monitoring response: %s", thing.decode())
         return results
 
     def _encode_numbered_json_thing(self, data):
         assert isinstance(data, list)
-        results = ""
+        results = bytearray()
         for obj in data:
-            msg = str(len(obj)) + json.dumps(obj, separators=(",", ":"))
-            msg = "{}:{}".format(len(msg), msg)
-            results += msg
-        return results.encode()
+            msg = str(len(obj)).encode() + _json_dumps_ascii(obj)
+            results += str(len(msg)).encode() + b":" + msg
+        return bytes(results)
 
     def initialize(self):
 
         logger.debug("Initializing new monitoring session.")
 
-        response = self.client.session.get(
+        response = self.session.get(
             "{}?sessionId={}&EIO=3&transport=polling".format(
                 self.root_url, self.session_id
-            )
+            ),
+            timeout=POLL_TIMEOUT,
         )
 
         self.sid = self._decode_numbered_json_thing(response.content)[0]["sid"]
 
-        logger.debug("New monitoring session ID is: {}".format(self.sid))
+        logger.debug("New monitoring session ID is: %s", self.sid)
+
+        # the polling and posting URLs stay the same for the rest of this session, so build them just once
+        self._poll_url = "{}?sessionId={}&EIO=3&transport=polling&sid={}".format(
+            self.root_url, self.session_id, self.sid
+        )
+        self._post_url = "{}?sessionId={}&transport=polling&sid={}".format(
+            self.root_url, self.session_id, self.sid
+        )
 
         # resubscribe to any existing subscriptions if we're reconnecting
-        old_subscriptions, self._subscriptions = self._subscriptions, set()
-        self.subscribe(old_subscriptions)
+        with self._subscriptions_lock:
+            old_subscriptions, self._subscriptions = self._subscriptions, {}
+        self.subscribe(list(old_subscriptions.values()))
 
     def subscribe(self, records):
+        """
+        Queue up the record(s) to be subscribed to. Records are typically subscribed one at a time as they're
+        instantiated, so rather than posting each one separately, they're batched up over a short window and
+        subscribed with a single request.
+        """
 
         if isinstance(records, set):
             records = list(records)
@@ -75,91 +220,170 @@ class Monitor(object):
         if not isinstance(records, list):
             records = [records]
 
-        sub_data = []
+        if not records:
+            return
 
-        for record in records:
+        with self._pending_lock:
+            self._pending_subscriptions += records
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(
+                    SUBSCRIPTION_BATCH_DELAY, self.flush_subscriptions
+                )
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
 
-            if record not in self._subscriptions:
+    def flush_subscriptions(self):
+        """
+        Immediately subscribe to any records that are still queued up by `subscribe`.
+        """
 
-                logger.debug(
-                    "Subscribing new record to the monitoring watchlist: {}/{}".format(
-                        record._table, record.id
-                    )
-                )
+        with self._pending_lock:
+            records, self._pending_subscriptions = self._pending_subscriptions, []
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
 
-                # add the record to the list of records to restore if we're disconnected
-                self._subscriptions.add(record)
-
-                # subscribe to changes to the record itself
-                sub_data.append(
-                    {
-                        "type": "/api/v1/registerSubscription",
-                        "requestId": str(uuid.uuid4()),
-                        "key": "versions/{}:{}".format(record.id, record._table),
-                        "version": record.get("version", -1),
-                    }
-                )
+        # this usually runs on its own timer thread, so log any errors rather than letting them vanish with it
+        try:
+            self._subscribe_records(records)
+        except Exception as e:
+            logger.error("Encountered error subscribing to records!")
+            logger.error(e, exc_info=True)
+
+    def _subscribe_records(self, records):
+
+        # claim the records that aren't subscribed yet; this is all that needs the lock, since building the
+        # messages below may have to fetch record versions from the server
+        new_records = []
+        with self._subscriptions_lock:
+            for record in records:
+                record_key = (record._table, record.id)
+                if record_key not in self._subscriptions:
+                    # add the record to the list of records to restore if we're disconnected
+                    self._subscriptions[record_key] = record
+                    new_records.append(record)
 
-                # if it's a collection, subscribe to changes to its children too
-                if isinstance(record, Collection):
-                    sub_data.append(
-                        {
-                            "type": "/api/v1/registerSubscription",
-                            "requestId": str(uuid.uuid4()),
-                            "key": "collection/{}".format(record.id),
-                            "version": -1,
-                        }
-                    )
+        try:
+            data = self._build_subscription_data(new_records)
+        except Exception as e:
+            # nothing was sent for these records, so treat it like a failed post and try them again later
+            logger.error("Encountered error building monitoring subscriptions!")
+            logger.error(e, exc_info=True)
+            self._retry_subscriptions(new_records)
+            return
 
-        data = self._encode_numbered_json_thing(sub_data)
+        self.post_data(data, records=new_records)
 
-        self.post_data(data)
+    def _build_subscription_data(self, records):
 
-    def post_data(self, data):
+        sub_data = []
+
+        # draw the randomness for all the request IDs we might need at once, rather than one call per ID
+        request_ids = _generate_request_ids(2 * len(records))
+
+        for record in records:
+
+            logger.debug(
+                "Subscribing new record to the monitoring watchlist: %s/%s",
+                record._table,
+                record.id,
+            )
+
+            # subscribe to changes to the record itself
+            sub = _SUBSCRIPTION_TEMPLATE.copy()
+            sub["requestId"] = next(request_ids)
+            sub["key"] = "versions/{}:{}".format(record.id, record._table)
+            sub["version"] = record.get("version", -1)
+            sub_data.append(sub)
+
+            # if it's a collection, subscribe to changes to its children too
+            if isinstance(record, Collection):
+                sub = _SUBSCRIPTION_TEMPLATE.copy()
+                sub["requestId"] = next(request_ids)
+                sub["key"] = "collection/{}".format(record.id)
+                sub_data.append(sub)
+
+        return self._encode_numbered_json_thing(sub_data)
+
+    def post_data(self, data, records=()):
+        """
+        Post `data` to the monitoring session. If it subscribes to `records`, they'll be resubscribed should the
+        post fail.
+        """
 
         if not data:
             return
 
-        logger.debug("Posting monitoring data: {}".format(data))
+        if self._post_queue is None:
+            self._send_data(data, records)
+        else:
+            self._post_queue.put((data, records))
 
-        self.client.session.post(
-            "{}?sessionId={}&transport=polling&sid={}".format(
-                self.root_url, self.session_id, self.sid
-            ),
-            data=data,
-        )
+    def _send_data(self, data, records):
+
+        logger.debug("Posting monitoring data: %s", data)
 
-    def poll(self, retries=10):
-        logger.debug("Starting new long-poll request")
         try:
-            response = self.client.session.get(
-                "{}?sessionId={}&EIO=3&transport=polling&sid={}".format(
-                    self.root_url, self.session_id, self.sid
-                )
+            response = self.session.post(
+                self._post_url, data=data, timeout=POLL_TIMEOUT
             )
             response.raise_for_status()
-        except HTTPError as e:
+        except Exception as e:
+            logger.error("Encountered error posting monitoring data!")
+            logger.error(e, exc_info=True)
+            if records:
+                self._retry_subscriptions(records)
+
+    def _retry_subscriptions(self, records):
+
+        # the server never registered these, so they mustn't count as subscribed
+        with self._subscriptions_lock:
+            for record in records:
+                record_key = (record._table, record.id)
+                if self._subscriptions.get(record_key) is record:
+                    del self._subscriptions[record_key]
+
+        timer = threading.Timer(
+            SUBSCRIPTION_RETRY_DELAY, self.subscribe, args=(list(records),)
+        )
+        timer.daemon = True
+        timer.start()
+
+    def _post_forever(self):
+        while True:
+            data, records = self._post_queue.get()
+            self._send_data(data, records)
+
+    def poll(self, retries=10):
+        logger.debug("Starting new long-poll request")
+        # count down the number of retries remaining, backing off exponentially between attempts
+        for remaining in range(retries, -1, -1):
+            response = None
             try:
-                message = "{} / {}".format(response.content, e)
-            except:
-                message = "{}".format(e)
-            logger.warn(
-                "Problem with submitting polling request: {} (will retry {} more times)".format(
-                    message, retries
-                )
-            )
-            time.sleep(0.1)
-            if retries <= 0:
-                raise
-            if retries <= 5:
-                logger.error(
-                    "Persistent error submitting polling request: {} (will retry {} more times)".format(
-                        message, retries
+                response = self.session.get(self._poll_url, timeout=POLL_TIMEOUT)
+                response.raise_for_status()
+                break
+            except HTTPError as e:
+                try:
+                    message = "{} / {}".format(response.content, e)
+                except:
+                    message = "{}".format(e)
+                logger.warn(
+                    "Problem with submitting polling request: {} (will retry {} more times)".format(
+                        message, remaining
                     )
                 )
-                # if we're close to giving up, also try reinitializing the session
-                self.initialize()
-            self.poll(retries=retries - 1)
+                if remaining <= 0:
+                    raise
+                time.sleep(min(0.1 * 2 ** (retries - remaining), 5))
+                if remaining <= 5:
+                    logger.error(
+                        "Persistent error submitting polling request: {} (will retry {} more times)".format(
+                            message, remaining
+                        )
+                    )
+                    # if we're close to giving up, also try reinitializing the session
+                    self.initialize()
 
         self._refresh_updated_records(
             self._decode_numbered_json_thing(response.content)
@@ -167,12 +391,13 @@ class Monitor(object):
 
     def _refresh_updated_records(self, events):
 
-        records_to_refresh = defaultdict(list)
+        records_to_refresh = defaultdict(set)
+        changed_collection_ids = set()
 
         for event in events:
 
             logger.debug(
-                "Received the following event from the remote server: {}".format(event)
+                "Received the following event from the remote server: %s", event
             )
 
             if not isinstance(event, dict):
@@ -184,7 +409,7 @@ class Monitor(object):
 
                 if key.startswith("versions/"):
 
-                    match = re.match("versions/([^\:]+):(.+)", key)
+                    match = _VERSION_KEY_RE.match(key)
                     if not match:
                         continue
 
@@ -195,51 +420,69 @@ class Monitor(object):
                     )
                     if event["value"] > local_version:
                         logger.debug(
-                            "Record {}/{} has changed; refreshing to update from version {} to version {}".format(
-                                record_table, record_id, local_version, event["value"]
-                            )
+                            "Record %s/%s has changed; refreshing to update from version %s to version %s",
+                            record_table,
+                            record_id,
+                            local_version,
+                            event["value"],
                         )
-                        records_to_refresh[record_table].append(record_id)
+                        records_to_refresh[record_table].add(record_id)
                     else:
                         logger.debug(
-                            "Record {}/{} already at version {}, not trying to update to version {}".format(
-                                record_table, record_id, local_version, event["value"]
-                            )
+                            "Record %s/%s already at version %s, not trying to update to version %s",
+                            record_table,
+                            record_id,
+                            local_version,
+                            event["value"],
                         )
 
                 if key.startswith("collection/"):
 
-                    match = re.match("collection/(.+)", key)
+                    match = _COLLECTION_KEY_RE.match(key)
                     if not match:
                         continue
 
-                    collection_id = match.groups()[0]
+                    changed_collection_ids.add(match.groups()[0])
 
-                    self.client.refresh_collection_rows(collection_id)
-                    row_ids = self.client._store.get_collection_rows(collection_id)
+        # query the changed collections one at a time on this thread: each query writes its results into the store,
+        # which fires callbacks, and those are expected to run one at a time
+        for collection_id in changed_collection_ids:
 
-                    logger.debug(
-                        "Something inside collection {} has changed; refreshing all {} rows inside it".format(
-                            collection_id, len(row_ids)
-                        )
-                    )
+            row_ids = self.client.get_collection_row_ids(collection_id)
+
+            self.client._store.set_collection_rows(collection_id, row_ids)
 
-                    records_to_refresh["block"] += row_ids
+            logger.debug(
+                "Something inside collection %s has changed; refreshing all %s rows inside it",
+                collection_id,
+                len(row_ids),
+            )
 
-        self.client.refresh_records(**records_to_refresh)
+            records_to_refresh["block"].update(row_ids)
+
+        self.client.refresh_records(
+            **{table: list(ids) for table, ids in records_to_refresh.items()}
+        )
 
     def poll_async(self):
         if self.thread:
             # Already polling async; no need to have two threads
             return
+        # the sender thread lives alongside the polling thread, handling posts for as long as we're polling
+        self._post_queue = queue.Queue()
+        threading.Thread(target=self._post_forever, daemon=True).start()
         self.thread = threading.Thread(target=self.poll_forever, daemon=True)
         self.thread.start()
 
     def poll_forever(self):
+        # back off exponentially across consecutive failures, so an outage doesn't turn into a request storm
+        backoff = 1
         while True:
             try:
                 self.poll()
+                backoff = 1
             except Exception as e:
                 logger.error("Encountered error during polling!")
                 logger.error(e, exc_info=True)
-                time.sleep(1)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
@@ -1,5 +1,3 @@
-from copy import deepcopy
-
 from .logger import logger
 from .operations import build_operation
 from .utils import extract_id, get_by_path
@@ -7,6 +5,10 @@ from .utils import extract_id, get_by_path
 
 class Record(object):
 
+    # subclasses that don't add any instance attributes of their own can declare an empty `__slots__` too, so
+    # their instances don't carry a `__dict__` at all
+    __slots__ = ("_client", "_id", "_callbacks", "__weakref__")
+
     # if a subclass has a list of ids that should be update when child records are removed, it should specify the key here
     child_list_key = None
 
@@ -14,8 +16,9 @@ class Record(object):
         self._client = client
         self._id = extract_id(id)
         self._callbacks = []
-        if self._client._monitor is not None:
-            self._client._monitor.subscribe(self)
+        monitor = client._monitor
+        if monitor is not None:
+            monitor.subscribe(self)
 
     @property
     def id(self):
@@ -32,13 +35,13 @@ class Record(object):
         return ["id"]
 
     def __str__(self):
-        return ", ".join(
-            [
-                "{}={}".format(field, repr(getattr(self, field)))
-                for field in self._str_fields()
-                if getattr(self, field, "")
-            ]
-        )
+        # look each field up only once, since some of them are properties that go through the store
+        fields = []
+        for field in self._str_fields():
+            value = getattr(self, field, "")
+            if value:
+                fields.append("{}={}".format(field, repr(value)))
+        return ", ".join(fields)
 
     def __repr__(self):
         return "<{} ({})>".format(self.__class__.__name__, self)
@@ -51,8 +54,9 @@ class Record(object):
 
     def _convert_diff_to_changelist(self, difference, old_val, new_val):
         changed_values = set()
-        for operation, path, values in deepcopy(difference):
-            path = path.split(".") if isinstance(path, str) else path
+        for operation, path, values in difference:
+            # only the path gets modified below, so copy just that rather than the whole diff
+            path = path.split(".") if isinstance(path, str) else list(path)
             if operation in ["add", "remove"]:
                 path.append(values[0][0])
             while isinstance(path[-1], int):
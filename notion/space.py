@@ -5,6 +5,8 @@ from .records import Record
 
 class Space(Record):
 
+    __slots__ = ()
+
     _table = "space"
 
     child_list_key = "pages"
@@ -5,6 +5,8 @@ from .records import Record
 
 class User(Record):
 
+    __slots__ = ()
+
     _table = "notion_user"
 
     given_name = field_map("given_name")
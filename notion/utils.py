@@ -1,13 +1,16 @@
 import requests
 import uuid
 
-from bs4 import BeautifulSoup
 from urllib.parse import urlparse, parse_qs, quote_plus, unquote_plus
 from datetime import datetime
+from functools import lru_cache
 from slugify import slugify as _dash_slugify
 
 from .settings import BASE_URL, SIGNED_URL_PREFIX, S3_URL_PREFIX, S3_URL_PREFIX_ENCODED
 
+# embed.ly lookups share a session, so that successive lookups can reuse its kept-alive connection
+_embed_session = requests.Session()
+
 
 class InvalidNotionIdentifier(Exception):
     pass
@@ -41,7 +44,7 @@ def extract_id(url_or_id):
 
 def get_embed_data(source_url):
 
-    return requests.get(
+    return _embed_session.get(
         "https://api.embed.ly/1/oembed?key=421626497c5d4fc2ae6b075189d602a2&url={}".format(
             source_url
         )
@@ -55,6 +58,9 @@ def get_embed_link(source_url):
     if "html" not in data:
         return source_url
 
+    # BeautifulSoup is slow to import and only needed here, so don't load it until an embed link is resolved
+    from bs4 import BeautifulSoup
+
     url = list(BeautifulSoup(data["html"], "html.parser").children)[0]["src"]
 
     return parse_qs(urlparse(url).query)["src"][0]
@@ -85,14 +91,21 @@ def remove_signed_prefix_as_needed(url):
         return url
 
 
+@lru_cache(maxsize=4096)
 def slugify(original):
     return _dash_slugify(original).replace("-", "_")
 
 
+@lru_cache(maxsize=1024)
+def _split_path(path):
+    return tuple(path.split("."))
+
+
 def get_by_path(path, obj, default=None):
 
+    # the same handful of dotted paths get looked up over and over, so only split each of them once
     if isinstance(path, str):
-        path = path.split(".")
+        path = _split_path(path)
 
     value = obj
 
@@ -28,6 +28,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/jamalex/notion-py",
     install_requires=install_requires,
+    extras_require={"orjson": ["orjson"]},
     include_package_data=True,
     packages=setuptools.find_packages(),
     python_requires=">=3.5",